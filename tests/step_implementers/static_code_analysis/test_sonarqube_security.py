@@ -1,17 +1,35 @@
+import io
 import os
+import sys
 import unittest
-from unittest.mock import patch
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import MagicMock, patch
 
-import sh
 from testfixtures import TempDirectory
 
 from tests.helpers.test_utils import run_step_test_with_result_validation
 
+from tssc import TSSCFactory
 from tssc.step_implementers.static_code_analysis import SonarQube
 
 
+def create_sonar_scanner_side_effect(return_code=0, mock_stdout='', mock_stderr='', effect=None):
+    def sonar_scanner_side_effect(*args, **kwargs):
+        if effect:
+            effect(*args, **kwargs)
+
+        scanner_process = MagicMock()
+        scanner_process.__enter__.return_value = scanner_process
+        scanner_process.stdout = io.StringIO(mock_stdout)
+        scanner_process.stderr = io.StringIO(mock_stderr)
+        scanner_process.wait.return_value = return_code
+        return scanner_process
+
+    return sonar_scanner_side_effect
+
+
 class TestStepImplementerSonarQube(unittest.TestCase):
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonarqube_ok(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -66,7 +84,7 @@ class TestStepImplementerSonarQube(unittest.TestCase):
             run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                  config, expected_step_results, runtime_args)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonar_missing_user(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -101,12 +119,12 @@ class TestStepImplementerSonarQube(unittest.TestCase):
             }
 
             with self.assertRaisesRegex(
-                    AssertionError,
+                    ValueError,
                     r'Either username or password is not set. Neither or both must be set.'):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results, runtime_args)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonar_missing_password(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -140,12 +158,12 @@ class TestStepImplementerSonarQube(unittest.TestCase):
             expected_step_results = {
             }
             with self.assertRaisesRegex(
-                    AssertionError,
+                    ValueError,
                     r'Either username or password is not set. Neither or both must be set.'):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results, runtime_args)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonar_missing_user_and_password(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -197,7 +215,7 @@ class TestStepImplementerSonarQube(unittest.TestCase):
             run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                  config, expected_step_results)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonar_missing_version(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -234,7 +252,7 @@ class TestStepImplementerSonarQube(unittest.TestCase):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonar_bad_sonar_scanner_results(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -263,15 +281,14 @@ class TestStepImplementerSonarQube(unittest.TestCase):
                 }
             }
             expected_step_results = {}
-            sh.sonar_scanner.side_effect = sh.ErrorReturnCode('sonar_scanner',
-                                                              b'mock stdout', b'mock error')
+            sonar_mock.side_effect = create_sonar_scanner_side_effect(return_code=1)
             with self.assertRaisesRegex(
                     RuntimeError,
                     'Error invoking sonarscanner'):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonarqube_missing_url(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -306,7 +323,7 @@ class TestStepImplementerSonarQube(unittest.TestCase):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results)
 
-    @patch('sh.sonar_scanner', create=True)
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
     def test_sonarqube_missing_properties_file(self, sonar_mock):
         with TempDirectory() as temp_dir:
             tssc_results = '''tssc-results:
@@ -336,3 +353,782 @@ class TestStepImplementerSonarQube(unittest.TestCase):
                     r'Properties file in tssc config not found.*'):
                 run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
                                                      config, expected_step_results)
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_analysis_cache_args(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            args = sonar_mock.call_args[0][0]
+            self.assertIn('-Dsonar.analysisCache.enabled=true', args)
+            self.assertIn('-Dsonar.java.skipUnchanged=true', args)
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_analysis_cache_disabled(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties,
+                            'analysis-cache': False,
+                            'skip-unchanged': False
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            args = sonar_mock.call_args[0][0]
+            self.assertNotIn('-Dsonar.analysisCache.enabled=true', args)
+            self.assertNotIn('-Dsonar.java.skipUnchanged=true', args)
+
+    def test_cache_friendly_version(self):
+        self.assertEqual(
+            SonarQube._cache_friendly_version('42.1.0-feature_foo+abc123'),
+            '42.1.0-feature_foo'
+        )
+        self.assertEqual(SonarQube._cache_friendly_version('42.1.0+abc123'), '42.1.0')
+        self.assertEqual(SonarQube._cache_friendly_version('1.0-123abc'), '1.0-123abc')
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_cache_friendly_project_version(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 42.1.0-feature_foo+abc123
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            args = sonar_mock.call_args[0][0]
+            self.assertIn('-Dsonar.projectVersion=42.1.0-feature_foo', args)
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_user_home(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            user_home = os.path.join(temp_dir.path, 'ci-cache', 'sonar')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties,
+                            'user-home': user_home
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            args = sonar_mock.call_args[0][0]
+            self.assertIn(f'-Dsonar.userHome={user_home}', args)
+            self.assertTrue(os.path.isdir(user_home))
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_user_home_default(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            args = sonar_mock.call_args[0][0]
+            self.assertFalse([arg for arg in args if arg.startswith('-Dsonar.userHome=')])
+            self.assertFalse(
+                os.path.exists(os.path.join(temp_dir.path, 'tssc-working', '.tssc-sonar-cache')))
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_scanner_args_with_auth(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.config.set_step_config_overrides('static-code-analysis', {
+                'user': 'unit.test.user',
+                'password': 'unit.test.password'
+            })
+            factory.run_step('static-code-analysis')
+
+            working_dir = os.path.join(temp_dir.path, 'tssc-working')
+            self.assertEqual(
+                sonar_mock.call_args[0][0],
+                [
+                    SonarQube._get_scanner_bin(),
+                    f'-Dproject.settings={os.path.realpath(properties)}',
+                    '-Dsonar.host.url=https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                    '-Dsonar.projectVersion=1.0-123abc',
+                    '-Dsonar.projectKey=tssc:tssc-reference-testcase',
+                    f'-Dsonar.working.directory={working_dir}/static-code-analysis',
+                    '-Dsonar.login=unit.test.user',
+                    '-Dsonar.password=unit.test.password',
+                    '-Dsonar.analysisCache.enabled=true',
+                    '-Dsonar.java.skipUnchanged=true',
+                    '-Dsonar.scanner.skipJreProvisioning=true'
+                ]
+            )
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_skip_scan_if_unchanged(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            temp_dir.write('src/main/java/App.java', b'class App {}')
+            sonar_properties = f'''
+                sonar.sources={temp_dir.path}/src/main/java
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties,
+                            'skip-scan-if-unchanged': True,
+                            'user-home': os.path.join(temp_dir.path, 'sonar-user-home')
+                        }
+                    }
+                }
+            }
+            report_task_file = os.path.join(
+                temp_dir.path, 'tssc-working', 'static-code-analysis', 'report-task.txt')
+
+            def write_report_task(*args, **kwargs):
+                with open(report_task_file, 'w') as report_task:
+                    report_task.write('ceTaskId=mock')
+            sonar_mock.side_effect = create_sonar_scanner_side_effect(effect=write_report_task)
+
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+            self.assertEqual(sonar_mock.call_count, 1)
+
+            os.remove(report_task_file)
+            factory.run_step('static-code-analysis')
+            self.assertEqual(sonar_mock.call_count, 1)
+            with open(report_task_file) as report_task:
+                self.assertEqual(report_task.read(), 'ceTaskId=mock')
+
+            temp_dir.write('src/main/java/App.java', b'class App { int changed; }')
+            factory.run_step('static-code-analysis')
+            self.assertEqual(sonar_mock.call_count, 2)
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_properties_file_is_directory(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            properties = temp_dir.makedir('sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            expected_step_results = {
+            }
+            with self.assertRaisesRegex(
+                    ValueError,
+                    r'Properties file in tssc config not found.*'):
+                run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
+                                                     config, expected_step_results)
+            sonar_mock.assert_not_called()
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_java_home(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties,
+                            'skip-jre-provisioning': False,
+                            'java-home': '/usr/lib/jvm/jre-11'
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            self.assertNotIn('-Dsonar.scanner.skipJreProvisioning=true',
+                             sonar_mock.call_args[0][0])
+            self.assertEqual(sonar_mock.call_args[1]['env']['JAVA_HOME'], '/usr/lib/jvm/jre-11')
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_properties_file_without_sources(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                # sonar.sources=src/main/java/
+                sonar.sourceEncoding=UTF-8
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+
+            sonar_mock.assert_called_once()
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_properties_file_not_valid(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                sonar.projectName=TSSC \\u12
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            expected_step_results = {
+            }
+            with self.assertRaisesRegex(
+                    ValueError,
+                    r'Properties file in tssc config is not valid'):
+                run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
+                                                     config, expected_step_results)
+            sonar_mock.assert_not_called()
+
+    def test_load_sonar_properties(self):
+        with TempDirectory() as temp_dir:
+            sonar_properties = '''
+                # comment \\
+                ! also a comment
+                sonar.qualitygate.wait=true
+                sonar.projectName: TSSC Quarkus Reference App
+                sonar.sources=src/main/java/,\\
+                    src/main/resources/
+                sonar.sourceEncoding UTF-8
+                sonar.modules=a,b
+                [not a section]
+                a.sonar.sources   =  src
+                sonar.tests=src/test/java/
+                sonar.projectDescription=Caf\\u00e9\\tApp
+                sonar.empty
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+
+            self.assertEqual(
+                SonarQube._load_sonar_properties(
+                    os.path.join(temp_dir.path, 'sonar-project.properties')),
+                {
+                    'sonar.qualitygate.wait': 'true',
+                    'sonar.projectName': 'TSSC Quarkus Reference App',
+                    'sonar.sources': 'src/main/java/,src/main/resources/',
+                    'sonar.sourceEncoding': 'UTF-8',
+                    'sonar.modules': 'a,b',
+                    '[not': 'a section]',
+                    'a.sonar.sources': 'src',
+                    'sonar.tests': 'src/test/java/',
+                    'sonar.projectDescription': 'Caf\u00e9\tApp',
+                    'sonar.empty': ''
+                }
+            )
+
+    def test_load_sonar_properties_iso_8859_1(self):
+        with TempDirectory() as temp_dir:
+            temp_dir.write('sonar-project.properties',
+                           'sonar.projectName=Caf\u00e9\n'.encode('iso-8859-1'))
+
+            self.assertEqual(
+                SonarQube._load_sonar_properties(
+                    os.path.join(temp_dir.path, 'sonar-project.properties')),
+                {'sonar.projectName': 'Caf\u00e9'}
+            )
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_null_character_in_arg(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com\0',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            expected_step_results = {
+            }
+            with self.assertRaisesRegex(
+                    ValueError,
+                    r'sonar-scanner argument \(-Dsonar.host.url\) contains a null character'):
+                run_step_test_with_result_validation(temp_dir, 'static-code-analysis',
+                                                     config, expected_step_results)
+            sonar_mock.assert_not_called()
+
+    @patch('shutil.which', return_value='/opt/sonar-scanner/bin/sonar-scanner')
+    def test_get_scanner_bin(self, which_mock):
+        SonarQube._SCANNER_BIN = None
+        try:
+            self.assertEqual(SonarQube._get_scanner_bin(), '/opt/sonar-scanner/bin/sonar-scanner')
+            self.assertEqual(SonarQube._get_scanner_bin(), '/opt/sonar-scanner/bin/sonar-scanner')
+            which_mock.assert_called_once_with('sonar-scanner')
+        finally:
+            SonarQube._SCANNER_BIN = None
+
+    @patch('shutil.which', return_value=None)
+    def test_get_scanner_bin_not_on_path(self, which_mock):
+        SonarQube._SCANNER_BIN = None
+        try:
+            self.assertEqual(SonarQube._get_scanner_bin(), 'sonar-scanner')
+        finally:
+            SonarQube._SCANNER_BIN = None
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect(
+        mock_stdout='INFO: Scanner configuration file\nINFO: ANALYSIS SUCCESSFUL\n'))
+    def test_sonarqube_output_written_to_stdout(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                factory.run_step('static-code-analysis')
+
+            self.assertIn('INFO: ANALYSIS SUCCESSFUL', stdout.getvalue())
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect())
+    def test_sonarqube_skip_scan_if_unchanged_default_off(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            temp_dir.write('src/main/java/App.java', b'class App {}')
+            sonar_properties = f'''
+                sonar.sources={temp_dir.path}/src/main/java
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            report_task_file = os.path.join(
+                temp_dir.path, 'tssc-working', 'static-code-analysis', 'report-task.txt')
+
+            def write_report_task(*args, **kwargs):
+                with open(report_task_file, 'w') as report_task:
+                    report_task.write('ceTaskId=mock')
+            sonar_mock.side_effect = create_sonar_scanner_side_effect(effect=write_report_task)
+
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            factory.run_step('static-code-analysis')
+            factory.run_step('static-code-analysis')
+            self.assertEqual(sonar_mock.call_count, 2)
+
+    def test_sources_fingerprint_dangling_symlink(self):
+        with TempDirectory() as temp_dir:
+            temp_dir.write('src/main/java/App.java', b'class App {}')
+            os.symlink(os.path.join(temp_dir.path, 'does-not-exist'),
+                       os.path.join(temp_dir.path, 'src/main/java/Dangling.java'))
+            sonar_properties = {'sonar.sources': os.path.join(temp_dir.path, 'src/main/java')}
+
+            fingerprint = SonarQube._sources_fingerprint(sonar_properties, [])
+            self.assertEqual(SonarQube._sources_fingerprint(sonar_properties, []), fingerprint)
+
+            temp_dir.write('does-not-exist', b'now it does')
+            self.assertNotEqual(
+                SonarQube._sources_fingerprint(sonar_properties, []), fingerprint)
+
+    def test_sources_fingerprint_ignores_credentials(self):
+        sonar_properties = {'sonar.sources': 'src/main/java/'}
+        args = ['-Dsonar.host.url=https://sonarqube-sonarqube.apps.tssc.rht-set.com']
+
+        self.assertEqual(
+            SonarQube._sources_fingerprint(
+                sonar_properties,
+                [*args, '-Dsonar.login=unit.test.user', '-Dsonar.password=unit.test.password']
+            ),
+            SonarQube._sources_fingerprint(sonar_properties, args)
+        )
+
+    @patch('subprocess.Popen', side_effect=create_sonar_scanner_side_effect(
+        mock_stderr='WARN: Scanner warning\n'))
+    def test_sonarqube_output_written_to_stderr(self, sonar_mock):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                factory.run_step('static-code-analysis')
+
+            self.assertIn('WARN: Scanner warning', stderr.getvalue())
+
+    def test_sonarqube_undecodable_scanner_output(self):
+        with TempDirectory() as temp_dir:
+            tssc_results = '''tssc-results:
+                generate-metadata:
+                    version: 1.0-123abc
+            '''
+            temp_dir.write('tssc-results/tssc-results.yml', tssc_results.encode())
+            sonar_properties = '''
+                used to test existence of file
+            '''
+            temp_dir.write('sonar-project.properties', sonar_properties.encode())
+            properties = os.path.join(temp_dir.path, 'sonar-project.properties')
+            # fake sonar-scanner writing an undecodable byte followed by more than a pipe
+            # buffer worth of stderr, which would block the scanner if stderr stops being read
+            sonar_scanner = temp_dir.write('sonar-scanner', f'''#!{sys.executable}
+import sys
+sys.stderr.buffer.write(b'\\377\\n' + b'x' * 200000 + b'\\n')
+sys.stdout.write('ANALYSIS SUCCESSFUL\\n')
+'''.encode())
+            os.chmod(sonar_scanner, 0o755)
+            config = {
+                'tssc-config': {
+                    'global-defaults': {
+                        'application-name': 'tssc',
+                        'service-name': 'tssc-reference-testcase'
+                    },
+                    'static-code-analysis': {
+                        'implementer': 'SonarQube',
+                        'config': {
+                            'url': 'https://sonarqube-sonarqube.apps.tssc.rht-set.com',
+                            'properties': properties
+                        }
+                    }
+                }
+            }
+            factory = TSSCFactory(config, os.path.join(temp_dir.path, 'tssc-results'),
+                                  work_dir_path=os.path.join(temp_dir.path, 'tssc-working'))
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            with patch.object(SonarQube, '_SCANNER_BIN', sonar_scanner), \
+                    redirect_stdout(stdout), redirect_stderr(stderr):
+                factory.run_step('static-code-analysis')
+
+            self.assertIn('ANALYSIS SUCCESSFUL', stdout.getvalue())
+            self.assertIn('\ufffd', stderr.getvalue())
+            self.assertIn('x' * 200000, stderr.getvalue())
+
+    def test_get_cached_report_task_file_default_user_home(self):
+        sonar_properties = {'sonar.sources': 'src/main/java/'}
+        fingerprint = SonarQube._sources_fingerprint(sonar_properties, [])
+
+        with patch.dict(os.environ, {'SONAR_USER_HOME': '/ci-cache/sonar'}):
+            self.assertEqual(
+                SonarQube._get_cached_report_task_file(None, sonar_properties, []),
+                f'/ci-cache/sonar/tssc-skip/{fingerprint}/report-task.txt'
+            )
+        self.assertEqual(
+            SonarQube._get_cached_report_task_file('/user-home', sonar_properties, []),
+            f'/user-home/tssc-skip/{fingerprint}/report-task.txt'
+        )
+
+    def test_store_cached_report_task(self):
+        with TempDirectory() as temp_dir:
+            report_task_file = temp_dir.write('report-task.txt', b'ceTaskId=mock')
+            expired_entry = temp_dir.makedir('user-home/tssc-skip/expired')
+            temp_dir.write('user-home/tssc-skip/expired/report-task.txt', b'ceTaskId=old')
+            os.utime(expired_entry, (0, 0))
+            recent_entry = temp_dir.makedir('user-home/tssc-skip/recent')
+            cached_report_task_file = os.path.join(
+                temp_dir.path, 'user-home', 'tssc-skip', 'fingerprint', 'report-task.txt')
+
+            SonarQube._store_cached_report_task(report_task_file, cached_report_task_file)
+
+            with open(cached_report_task_file) as cached_report_task:
+                self.assertEqual(cached_report_task.read(), 'ceTaskId=mock')
+            self.assertEqual(os.listdir(os.path.dirname(cached_report_task_file)),
+                             ['report-task.txt'])
+            self.assertFalse(os.path.exists(expired_entry))
+            self.assertTrue(os.path.exists(recent_entry))
+
+    def test_restore_cached_report_task_missing(self):
+        with TempDirectory() as temp_dir:
+            report_task_file = os.path.join(temp_dir.path, 'report-task.txt')
+
+            self.assertFalse(SonarQube._restore_cached_report_task(None, report_task_file))
+            self.assertFalse(SonarQube._restore_cached_report_task(
+                os.path.join(temp_dir.path, 'tssc-skip', 'pruned', 'report-task.txt'),
+                report_task_file
+            ))
+            self.assertFalse(os.path.exists(report_task_file))
@@ -16,9 +16,60 @@ Step configuration key(s) for this step:
 | `user`            | False    | None                      | SonarQube user id
 |                   |          |                           | (sonar.login)
 | `password`        | False    | None                      | SonarQube password
+| `analysis-cache`  | False    | True                      | Use the SonarQube server
+|                   |          |                           | side analysis cache
+|                   |          |                           | (sonar.analysisCache.enabled)
+| `skip-unchanged`  | False    | True                      | Skip analysis of files that
+|                   |          |                           | are unchanged since the last
+|                   |          |                           | analysis of the branch
+|                   |          |                           | (sonar.java.skipUnchanged)
+| `cache-friendly-` | False    | True                      | Strip the build metadata
+| `version`         |          |                           | (+build) from the project
+|                   |          |                           | version so that it does not
+|                   |          |                           | change, and invalidate the
+|                   |          |                           | analysis cache, every run
+| `user-home`       | False    | None                      | Directory for scanner plugin,
+|                   |          |                           | analyzer and analysis caches
+|                   |          |                           | (sonar.userHome). Should be
+|                   |          |                           | persisted between runs. If
+|                   |          |                           | not given the scanner default
+|                   |          |                           | ($SONAR_USER_HOME or
+|                   |          |                           | ~/.sonar) is used.
+| `skip-scan-if-`   | False    | False                     | Do not run the scanner if
+| `unchanged`       |          |                           | the `sonar.sources` and
+|                   |          |                           | `sonar.tests` files, the
+|                   |          |                           | properties file and scanner
+|                   |          |                           | arguments are unchanged since
+|                   |          |                           | a previous successful scan,
+|                   |          |                           | reuse that scan's report.
+|                   |          |                           | SonarQube is then not
+|                   |          |                           | contacted at all, the quality
+|                   |          |                           | gate is not re-evaluated and
+|                   |          |                           | inputs outside `sonar.sources`
+|                   |          |                           | and `sonar.tests` (coverage
+|                   |          |                           | reports, binaries, ...) are
+|                   |          |                           | not considered. Files are
+|                   |          |                           | compared by size and
+|                   |          |                           | modification time, so this
+|                   |          |                           | only skips re-runs in the
+|                   |          |                           | same workspace, a fresh
+|                   |          |                           | checkout always scans.
+|                   |          |                           | Reports are kept in
+|                   |          |                           | <user home>/tssc-skip/ and
+|                   |          |                           | pruned after 7 days unused.
+| `skip-jre-`       | False    | True                      | Do not let sonar-scanner
+| `provisioning`    |          |                           | download a JRE, use the
+|                   |          |                           | local one instead
+|                   |          |                           | (sonar.scanner.
+|                   |          |                           | skipJreProvisioning)
+| `java-home`       | False    | None                      | JAVA_HOME of the local JRE
+|                   |          |                           | to run sonar-scanner with
 
 `user` and `password` can be specifed as runtime arguments.
 
+`analysis-cache` and `skip-unchanged` require a SonarQube server that supports the
+branch scoped analysis cache (SonarQube 9.4 or later). Older servers ignore these properties.
+
 Expected Previous Step Results
 ------------------------------
 
@@ -27,7 +78,9 @@ Results expected from previous steps:
 | Step Name           |  Key       | Description
 |---------------------|------------|------------
 | `generate-metadata` | `version`  |  SonarQube project version
-|                     |            |  (sonar.projectVersion)
+|                     |            |  (sonar.projectVersion),
+|                     |            |  without the build metadata
+|                     |            |  if `cache-friendly-version`
 
 Results
 -------
@@ -72,7 +125,11 @@ Example: Generated Sonar Scanner Call (uses both step configuration and previous
         -Dproject.settings=properties
         -Dsonar.host.url=url
         -Dsonar.projectVersion=generate-metadata.version
-        -Dsonar.projectKey=application-name.service-name
+        -Dsonar.projectKey=application-name:service-name
+        -Dsonar.analysisCache.enabled=true
+        -Dsonar.java.skipUnchanged=true
+        -Dsonar.userHome=user-home (if given)
+        -Dsonar.scanner.skipJreProvisioning=true
 
 Example: Existing Sonar Properties File (minimal)
 
@@ -126,25 +183,60 @@ Example: Results
 
 """
 
+import hashlib
 import os
+import re
+import shutil
+import stat
+import subprocess
 import sys
-import sh
+import tempfile
+import threading
+import time
 from tssc import StepImplementer
 
 DEFAULT_CONFIG = {
-    'properties': './sonar-project.properties'
+    'properties': './sonar-project.properties',
+    'analysis-cache': True,
+    'skip-unchanged': True,
+    'cache-friendly-version': True,
+    'user-home': None,
+    'skip-scan-if-unchanged': False,
+    'skip-jre-provisioning': True,
+    'java-home': None
 }
 
-AUTHENTICATION_CONFIG = {
-    'user': None,
-    'password': None
-}
+REPORT_TASK_FILE_NAME = 'report-task.txt'
+SKIP_SCAN_CACHE_DIR_NAME = 'tssc-skip'
+SKIP_SCAN_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+REPORT_ARTIFACT_NAME = 'sonarqube result set'
+RESULT_MESSAGE = 'sonarqube step completed - see report-artifacts'
+
+AUTHENTICATION_CONFIG = frozenset((
+    'user',
+    'password'
+))
 
-REQUIRED_CONFIG_KEYS = [
+AUTHENTICATION_ARG_PREFIXES = (
+    '-Dsonar.login=',
+    '-Dsonar.password='
+)
+
+REQUIRED_CONFIG_KEYS = (
     'url',
     'application-name',
     'service-name'
-]
+)
+
+# java.util.Properties line: key up to the first unescaped `=`, `:` or whitespace then value
+PROPERTIES_LINE_PATTERN = re.compile(r'((?:\\.|[^\\=:\s])*)\s*[=:]?\s*(.*)', re.DOTALL)
+PROPERTIES_ESCAPE_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{0,4}|.)', re.DOTALL)
+PROPERTIES_ESCAPES = {
+    't': '\t',
+    'n': '\n',
+    'r': '\r',
+    'f': '\f'
+}
 
 
 class SonarQube(StepImplementer):
@@ -152,6 +244,9 @@ class SonarQube(StepImplementer):
     StepImplementer for the tag-source step for SonarQube.
     """
 
+    # resolved path to sonar-scanner, shared by all instances, see _get_scanner_bin
+    _SCANNER_BIN = None
+
     @staticmethod
     def step_implementer_config_defaults():
         """
@@ -184,6 +279,182 @@ class SonarQube(StepImplementer):
         """
         return REQUIRED_CONFIG_KEYS
 
+    @classmethod
+    def _get_scanner_bin(cls):
+        """
+        Resolves the path to sonar-scanner on the PATH once per process.
+
+        Returns
+        -------
+        str
+            Absolute path to sonar-scanner or `sonar-scanner` if it is not on the PATH.
+        """
+        if not cls._SCANNER_BIN:
+            cls._SCANNER_BIN = shutil.which('sonar-scanner') or 'sonar-scanner'
+
+        return cls._SCANNER_BIN
+
+    @staticmethod
+    def _copy_lines(source, destination):
+        """
+        Copies every line read from the given source stream to the given destination stream.
+
+        Parameters
+        ----------
+        source : io.TextIOBase
+            Stream to read lines from until EOF.
+        destination : io.TextIOBase
+            Stream to write the lines to.
+        """
+        for line in source:
+            destination.write(line)
+        destination.flush()
+
+    @staticmethod
+    def _cache_friendly_version(version):
+        """
+        Strips the build metadata from the given semantic version.
+
+        The build metadata (typically a commit hash) changes every run which would
+        otherwise cause a SonarQube analysis cache miss on every scan.
+
+        Parameters
+        ----------
+        version : str
+            Semantic version, ex: 1.0.0-feature_foo+abc123
+
+        Returns
+        -------
+        str
+            Given version without build metadata, ex: 1.0.0-feature_foo
+        """
+        return version.split('+', 1)[0]
+
+    @staticmethod
+    def _load_sonar_properties(properties_file):
+        """
+        Loads a SonarQube properties file.
+
+        Notes
+        -----
+        Follows the java.util.Properties format: `#` and `!` comments, `=`, `:` or whitespace
+        separated keys and values, backslash line continuations and escapes. The file is
+        read as UTF-8, falling back to ISO-8859-1 (the java.util.Properties default).
+
+        Parameters
+        ----------
+        properties_file : str
+            Path to the SonarQube properties file.
+
+        Returns
+        -------
+        dict
+            SonarQube properties defined in the given file.
+
+        Raises
+        ------
+        ValueError
+            If the properties file contains a malformed \\uxxxx escape.
+        """
+        try:
+            with open(properties_file, 'r', encoding='utf-8') as properties:
+                properties_contents = properties.read()
+        except UnicodeDecodeError:
+            with open(properties_file, 'r', encoding='iso-8859-1') as properties:
+                properties_contents = properties.read()
+
+        def unescape(match):
+            escaped = match.group(1)
+            if escaped[0] == 'u':
+                if len(escaped) != 5:
+                    raise ValueError(
+                        f'Properties file in tssc config is not valid: {properties_file}: '
+                        f'malformed \\uxxxx encoding'
+                    )
+                return chr(int(escaped[1:], 16))
+            return PROPERTIES_ESCAPES.get(escaped, escaped)
+
+        sonar_properties = {}
+        logical_lines = []
+        logical_line = ''
+        for line in properties_contents.splitlines():
+            line = line.lstrip()
+            if not logical_line and (not line or line[0] in '#!'):
+                continue
+
+            # an odd number of trailing backslashes continues the line on the next line
+            if (len(line) - len(line.rstrip('\\'))) % 2:
+                logical_line += line[:-1]
+                continue
+
+            logical_lines.append(logical_line + line)
+            logical_line = ''
+        if logical_line:
+            logical_lines.append(logical_line)
+
+        for logical_line in logical_lines:
+            key, value = PROPERTIES_LINE_PATTERN.match(logical_line).groups()
+            sonar_properties[PROPERTIES_ESCAPE_PATTERN.sub(unescape, key)] = \
+                PROPERTIES_ESCAPE_PATTERN.sub(unescape, value)
+
+        return sonar_properties
+
+    @staticmethod
+    def _sources_fingerprint(sonar_properties, args):
+        """
+        Creates a fingerprint of the inputs to a sonar-scanner run.
+
+        Notes
+        -----
+        Files are fingerprinted by path, size and modification time rather than contents
+        so that no source file has to be read.
+
+        Parameters
+        ----------
+        sonar_properties : dict
+            SonarQube properties whose `sonar.sources` and `sonar.tests` paths, relative to
+            the current working directory, are fingerprinted.
+        args : list of str
+            Arguments sonar-scanner will be invoked with, authentication arguments are ignored.
+
+        Returns
+        -------
+        str
+            Hex digest fingerprinting the inputs or None if the properties do not define
+            `sonar.sources`, ie. the scanner defaults to scanning the project base directory.
+        """
+        if not sonar_properties.get('sonar.sources'):
+            return None
+
+        fingerprint = hashlib.blake2b()
+        for key, value in sorted(sonar_properties.items()):
+            fingerprint.update(f'{key}\0{value}\n'.encode('utf-8'))
+        # NOTE: credentials are left out, the fingerprint is stored as a directory name in a
+        #       (potentially shared) cache and should not change when credentials are rotated
+        fingerprint.update('\0'.join(
+            arg for arg in args if not arg.startswith(AUTHENTICATION_ARG_PREFIXES)
+        ).encode('utf-8'))
+        for property_key in ('sonar.sources', 'sonar.tests'):
+            for path in sonar_properties.get(property_key, '').split(','):
+                path = path.strip()
+                if not path:
+                    continue
+                file_paths = [path] if os.path.isfile(path) else []
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    file_paths += [os.path.join(root, file_name) for file_name in sorted(files)]
+                for file_path in file_paths:
+                    # NOTE: os.walk lists (possibly dangling) symlinks as files,
+                    #       os.stat follows them, so fingerprint missing targets as such
+                    try:
+                        file_stat = os.stat(file_path)
+                        file_fingerprint = f'{file_stat.st_size}\0{file_stat.st_mtime_ns}'
+                    except OSError:
+                        file_fingerprint = 'missing'
+                    fingerprint.update(f'{file_path}\0{file_fingerprint}\n'.encode('utf-8'))
+
+        return fingerprint.hexdigest()
+
     def _validate_runtime_step_config(self, runtime_step_config):
         """
         Validates the given `runtime_step_config` against the required step configuration keys.
@@ -197,14 +468,17 @@ class SonarQube(StepImplementer):
         Raises
         ------
         AssertionError
-            If the given `runtime_step_config` is not valid with a message as to why.
+            If the given `runtime_step_config` is missing required configuration keys.
+        ValueError
+            If only one of `user` and `password` is given.
         """
         super()._validate_runtime_step_config(runtime_step_config)  # pylint: disable=protected-access
 
-        assert (
-            all(element in runtime_step_config for element in AUTHENTICATION_CONFIG) or not any(
-                element in runtime_step_config for element in AUTHENTICATION_CONFIG) \
-            ), 'Either username or password is not set. Neither or both must be set.'
+        present_authentication_keys = sum(
+            1 for element in AUTHENTICATION_CONFIG if element in runtime_step_config
+        )
+        if present_authentication_keys not in (0, len(AUTHENTICATION_CONFIG)):
+            raise ValueError('Either username or password is not set. Neither or both must be set.')
 
     def _run_step(self):
         """Runs the TSSC step implemented by this StepImplementer.
@@ -214,74 +488,321 @@ class SonarQube(StepImplementer):
         dict
             Results of running this step.
         """
-
-        # Optional: user and password
-        user = ''
-        password = ''
-        if self.has_config_value(AUTHENTICATION_CONFIG):
-            if (self.get_config_value('user')
-                    and self.get_config_value('password')):
-                user = self.get_config_value('user')
-                password = self.get_config_value('password')
-
-        # Required: Get the generate-metadata.version
-        if (self.get_step_results('generate-metadata') and
-                self.get_step_results('generate-metadata').get('version')):
-            version = self.get_step_results('generate-metadata')['version']
-        else:
-            raise ValueError('Severe error: Generate-metadata results is missing a version tag')
-
-        # Required: properties and exists
-        properties_file = self.get_config_value('properties')
-        if not properties_file or not os.path.exists(properties_file):
-            raise ValueError('Properties file in tssc config not found: ' + properties_file)
-
-        try:
-            # Hint:  Call sonar-scanner with sh.sonar_scanner
-            #    https://amoffat.github.io/sh/sections/faq.html
-            working_directory = self.get_working_dir()
-            if user == '':
-                sh.sonar_scanner(  # pylint: disable=no-member
-                    '-Dproject.settings=' + self.get_config_value('properties'),
-                    '-Dsonar.host.url=' + self.get_config_value('url'),
-                    '-Dsonar.projectVersion=' + version,
-                    '-Dsonar.projectKey=' + \
-                        self.get_config_value('application-name') + \
-                        ':' + \
-                        self.get_config_value('service-name'),
-                    '-Dsonar.working.directory=' + working_directory,
-                    _out=sys.stdout,
-                    _err=sys.stderr
-                )
-            else:
-                sh.sonar_scanner(  # pylint: disable=no-member
-                    '-Dproject.settings=' + self.get_config_value('properties'),
-                    '-Dsonar.host.url=' + self.get_config_value('url'),
-                    '-Dsonar.projectVersion=' + version,
-                    '-Dsonar.projectKey=' + \
-                        self.get_config_value('application-name') + \
-                        ':' + \
-                        self.get_config_value('service-name'),
-                    '-Dsonar.login=' + user,
-                    '-Dsonar.password=' + password,
-                    '-Dsonar.working.directory=' + working_directory,
-                    _out=sys.stdout,
-                    _err=sys.stderr
-                )
-
-        except sh.ErrorReturnCode as error:  # pylint: disable=undefined-variable
-            raise RuntimeError('Error invoking sonarscanner: {all}'.format(all=error)) from error
-
+        version = self._get_project_version()
+        properties_file = self._get_properties_file()
+        sonar_properties = SonarQube._load_sonar_properties(properties_file)
+        working_directory = self.get_working_dir()
+        user_home = self._create_user_home()
+        args = self._create_scanner_args(properties_file, version, working_directory, user_home)
+
+        report_task_file = os.path.join(working_directory, REPORT_TASK_FILE_NAME)
         results = {
             'result': {
                 'success': True,
-                'message': 'sonarqube step completed - see report-artifacts',
+                'message': RESULT_MESSAGE,
             },
             'report-artifacts': [
                 {
-                    'name': 'sonarqube result set',
-                    'path': f'file://{working_directory}/report-task.txt'
+                    'name': REPORT_ARTIFACT_NAME,
+                    'path': f'file://{report_task_file}'
                 }
             ]
         }
+
+        # Optional: reuse the report of a previous scan of the exact same inputs
+        cached_report_task_file = None
+        if self.get_config_value('skip-scan-if-unchanged'):
+            cached_report_task_file = SonarQube._get_cached_report_task_file(
+                user_home, sonar_properties, args)
+            if SonarQube._restore_cached_report_task(cached_report_task_file, report_task_file):
+                return results
+
+        self._run_scanner(args)
+
+        if cached_report_task_file and os.path.exists(report_task_file):
+            SonarQube._store_cached_report_task(report_task_file, cached_report_task_file)
+
         return results
+
+    def _get_project_version(self):
+        """
+        Gets the SonarQube project version from the generate-metadata step results.
+
+        Returns
+        -------
+        str
+            The generate-metadata version, without build metadata if `cache-friendly-version`.
+
+        Raises
+        ------
+        ValueError
+            If the generate-metadata step results do not have a version.
+        """
+        generate_metadata_results = self.get_step_results('generate-metadata') or {}
+        version = generate_metadata_results.get('version')
+        if not version:
+            raise ValueError('Severe error: Generate-metadata results is missing a version tag')
+        if self.get_config_value('cache-friendly-version'):
+            version = SonarQube._cache_friendly_version(version)
+
+        return version
+
+    def _get_properties_file(self):
+        """
+        Gets the resolved path to the configured SonarQube properties file.
+
+        Returns
+        -------
+        str
+            Real path to the SonarQube properties file.
+
+        Raises
+        ------
+        ValueError
+            If the properties file does not exist or is not a file.
+        """
+        properties_file = self.get_config_value('properties')
+
+        # NOTE: stat once and pass the resolved path so the scanner does not re-resolve symlinks
+        try:
+            properties_file_stat = os.stat(properties_file)
+        except (OSError, TypeError) as error:
+            raise ValueError(
+                f'Properties file in tssc config not found: {properties_file}'
+            ) from error
+        if not stat.S_ISREG(properties_file_stat.st_mode):
+            raise ValueError(f'Properties file in tssc config not found: {properties_file}')
+
+        return os.path.realpath(properties_file)
+
+    def _create_user_home(self):
+        """
+        Creates, if configured and it does not exist, the sonar-scanner user home directory.
+
+        Returns
+        -------
+        str
+            Path to the configured sonar-scanner user home directory or None if not configured,
+            in which case the scanner uses its default ($SONAR_USER_HOME or ~/.sonar).
+        """
+        user_home = self.get_config_value('user-home')
+        if user_home:
+            os.makedirs(user_home, exist_ok=True)
+
+        return user_home
+
+    def _create_scanner_args(self, properties_file, version, working_directory, user_home):
+        """
+        Creates the arguments to invoke sonar-scanner with.
+
+        Parameters
+        ----------
+        properties_file : str
+            Path to the SonarQube properties file (project.settings).
+        version : str
+            SonarQube project version (sonar.projectVersion).
+        working_directory : str
+            SonarQube working directory (sonar.working.directory).
+        user_home : str
+            sonar-scanner user home directory (sonar.userHome) or None for the scanner default.
+
+        Returns
+        -------
+        list of str
+            Arguments to invoke sonar-scanner with.
+
+        Raises
+        ------
+        ValueError
+            If any of the argument values contain a null character.
+        """
+        project_key = f"{self.get_config_value('application-name')}:" \
+                      f"{self.get_config_value('service-name')}"
+        args = [
+            f'-Dproject.settings={properties_file}',
+            f"-Dsonar.host.url={self.get_config_value('url')}",
+            f'-Dsonar.projectVersion={version}',
+            f'-Dsonar.projectKey={project_key}',
+            f'-Dsonar.working.directory={working_directory}'
+        ]
+
+        # Optional: user and password
+        user = self.get_config_value('user')
+        password = self.get_config_value('password')
+        if user and password:
+            args += [f'-Dsonar.login={user}', f'-Dsonar.password={password}']
+
+        # Optional: only re-analyze files changed since the last analysis of the branch
+        if self.get_config_value('analysis-cache'):
+            args.append('-Dsonar.analysisCache.enabled=true')
+        if self.get_config_value('skip-unchanged'):
+            args.append('-Dsonar.java.skipUnchanged=true')
+
+        # Optional: persistent scanner home so plugins and caches survive between runs
+        if user_home:
+            args.append(f'-Dsonar.userHome={user_home}')
+
+        # Optional: run with a local JRE rather than one provisioned by the scanner every run
+        if self.get_config_value('skip-jre-provisioning'):
+            args.append('-Dsonar.scanner.skipJreProvisioning=true')
+
+        # NOTE: each argument is passed as a single argv element, no shell is involved so no
+        #       quoting is needed, but a null character can not be passed in an argument
+        for arg in args:
+            if '\0' in arg:
+                raise ValueError(
+                    f"Value for sonar-scanner argument ({arg.split('=', 1)[0]}) "
+                    "contains a null character"
+                )
+
+        return args
+
+    @staticmethod
+    def _get_cached_report_task_file(user_home, sonar_properties, args):
+        """
+        Gets the path a report-task.txt for a scan of the given inputs is cached at.
+
+        Parameters
+        ----------
+        user_home : str
+            sonar-scanner user home directory the cache is kept in or None to use the
+            scanner default ($SONAR_USER_HOME or ~/.sonar).
+        sonar_properties : dict
+            SonarQube properties of the scan.
+        args : list of str
+            Arguments sonar-scanner will be invoked with.
+
+        Returns
+        -------
+        str
+            Path to the cached report-task.txt, which may not exist yet, or None if the
+            scan inputs can not be fingerprinted.
+
+        See Also
+        --------
+        _sources_fingerprint
+        """
+        fingerprint = SonarQube._sources_fingerprint(sonar_properties, args)
+        if not fingerprint:
+            return None
+
+        if not user_home:
+            user_home = os.environ.get('SONAR_USER_HOME') or \
+                        os.path.join(os.path.expanduser('~'), '.sonar')
+
+        return os.path.join(user_home, SKIP_SCAN_CACHE_DIR_NAME, fingerprint, REPORT_TASK_FILE_NAME)
+
+    @staticmethod
+    def _restore_cached_report_task(cached_report_task_file, report_task_file):
+        """
+        Copies a cached report-task.txt, if there is one, to the step's report-task.txt.
+
+        Parameters
+        ----------
+        cached_report_task_file : str
+            Path to the cached report-task.txt or None.
+        report_task_file : str
+            Path to copy the cached report-task.txt to.
+
+        Returns
+        -------
+        bool
+            True if the cached report-task.txt was restored, False otherwise.
+        """
+        if not cached_report_task_file:
+            return False
+
+        # NOTE: the entry may be pruned by a concurrent run at any point, treat that as a miss
+        try:
+            shutil.copyfile(cached_report_task_file, report_task_file)
+            os.utime(os.path.dirname(cached_report_task_file))
+        except OSError:
+            return False
+
+        print('Sources unchanged since previous scan, reusing report: ' + cached_report_task_file)
+        return True
+
+    @staticmethod
+    def _store_cached_report_task(report_task_file, cached_report_task_file):
+        """
+        Caches the given report-task.txt and prunes cache entries unused for
+        SKIP_SCAN_CACHE_MAX_AGE_SECONDS.
+
+        Notes
+        -----
+        The report is written to a temporary file which is then moved into place so that
+        concurrent runs sharing the cache never read a partially written report.
+
+        Parameters
+        ----------
+        report_task_file : str
+            Path to the report-task.txt written by sonar-scanner.
+        cached_report_task_file : str
+            Path to cache the report-task.txt at.
+        """
+        cached_report_task_dir = os.path.dirname(cached_report_task_file)
+        os.makedirs(cached_report_task_dir, exist_ok=True)
+        temp_file_descriptor, temp_file = tempfile.mkstemp(dir=cached_report_task_dir)
+        try:
+            with os.fdopen(temp_file_descriptor, 'wb') as temp_report_task, \
+                    open(report_task_file, 'rb') as report_task:
+                shutil.copyfileobj(report_task, temp_report_task)
+            os.replace(temp_file, cached_report_task_file)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+
+        cache_dir = os.path.dirname(cached_report_task_dir)
+        expired = time.time() - SKIP_SCAN_CACHE_MAX_AGE_SECONDS
+        for entry in os.listdir(cache_dir):
+            entry_path = os.path.join(cache_dir, entry)
+            try:
+                if os.stat(entry_path).st_mtime < expired:
+                    shutil.rmtree(entry_path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _run_scanner(self, args):
+        """
+        Runs sonar-scanner with the given arguments.
+
+        Parameters
+        ----------
+        args : list of str
+            Arguments to invoke sonar-scanner with.
+
+        Raises
+        ------
+        RuntimeError
+            If sonar-scanner exits with a non-zero exit status.
+        """
+        scanner_env = None
+        java_home = self.get_config_value('java-home')
+        if java_home:
+            scanner_env = {**os.environ, 'JAVA_HOME': java_home}
+
+        # NOTE: the scanner output is copied line by line to sys.stdout and sys.stderr rather
+        #       than letting the scanner inherit the file descriptors so that it still goes
+        #       through any wrapping streams, ie. obfuscation of decrypted secrets
+        #       undecodable output is replaced rather than raised, otherwise the stderr copier
+        #       thread dies, stderr is no longer drained and the scanner blocks on write
+        with subprocess.Popen(
+                [SonarQube._get_scanner_bin(), *args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding='utf-8',
+                errors='replace',
+                env=scanner_env) as scanner_process:
+            stderr_copier = threading.Thread(
+                target=SonarQube._copy_lines,
+                args=(scanner_process.stderr, sys.stderr)
+            )
+            stderr_copier.start()
+            SonarQube._copy_lines(scanner_process.stdout, sys.stdout)
+            stderr_copier.join()
+            return_code = scanner_process.wait()
+        if return_code:
+            raise RuntimeError(
+                f'Error invoking sonarscanner: sonar-scanner returned non-zero exit status '
+                f'{return_code}'
+            )